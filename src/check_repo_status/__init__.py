@@ -1,8 +1,11 @@
 import sys
-from git import Repo, GitCommandError
+from git import Repo
 import os
 import json
 import time
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 
 
 def should_fetch(repo_path, remote_name, cache_seconds=60):
@@ -33,35 +36,215 @@ def update_fetch_cache(repo_path, remote_name):
         pass
 
 
-def check_repo_status(repo_path=".", do_pull=False, do_force=False):
+class RepoStatusError(Exception):
+    pass
+
+
+class RepoNotFoundError(RepoStatusError):
+    pass
+
+
+class BareRepoError(RepoStatusError):
+    pass
+
+
+class DetachedHeadError(RepoStatusError):
+    pass
+
+
+class RemoteNotFoundError(RepoStatusError):
+    pass
+
+
+class FetchError(RepoStatusError):
+    pass
+
+
+class BranchNotFoundError(RepoStatusError):
+    pass
+
+
+class PoolClosedError(RuntimeError):
+    pass
+
+
+def open_repo(repo_path):
     try:
-        repo = Repo(repo_path)
+        return Repo(repo_path)
     except Exception as e:
-        print(
+        raise RepoNotFoundError(
             f"Error: Could not open the repository at '{repo_path}'. Please check that the directory exists and is a valid git repository.\nDetails: {e}"
         )
-        sys.exit(1)
 
+
+class RepoPool:
+    # Keeps warm Repo handles (with their persistent `git cat-file` processes
+    # and object database caches) for repeated queries on the same repos.
+    # At most `max_size` handles are open at once: when every slot holds a
+    # handle in use, acquire() waits for one to be released. Idle handles are
+    # closed after `max_idle_seconds` whenever the pool is used, on
+    # evict_idle(), or every `reap_interval` seconds from a background thread.
+    # close() closes idle handles at once and handles in use when released.
+    def __init__(self, max_size=8, max_idle_seconds=300, reap_interval=None):
+        self.max_size = max_size
+        self.max_idle_seconds = max_idle_seconds
+        self._entries = OrderedDict()
+        self._opening = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._reaper = None
+        if reap_interval is not None:
+            self._reaper = threading.Thread(
+                target=self._reap, args=(reap_interval,), daemon=True
+            )
+            self._reaper.start()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._entries)
+
+    def __contains__(self, repo_path):
+        with self._cond:
+            return os.path.realpath(repo_path) in self._entries
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @contextmanager
+    def acquire(self, repo_path):
+        key = os.path.realpath(repo_path)
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolClosedError("RepoPool is closed.")
+                self._evict_idle(time.monotonic())
+                entry = self._checkout(key)
+                if entry is not None or self._make_room():
+                    break
+                self._cond.wait()
+            if entry is None:
+                # Hold the slot while the repo is opened outside the lock
+                self._opening += 1
+        if entry is None:
+            try:
+                repo = open_repo(repo_path)
+            except RepoStatusError:
+                with self._cond:
+                    self._opening -= 1
+                    self._cond.notify_all()
+                raise
+            with self._cond:
+                self._opening -= 1
+                if self._closed:
+                    repo.close()
+                    self._cond.notify_all()
+                    raise PoolClosedError("RepoPool is closed.")
+                # Another thread may have opened the same repo meanwhile
+                entry = self._checkout(key)
+                if entry is None:
+                    # Reentrant so a thread can query a repo it already holds
+                    entry = {"repo": repo, "lock": threading.RLock(), "in_use": 1}
+                    self._entries[key] = entry
+                else:
+                    repo.close()
+                    self._cond.notify_all()
+        try:
+            # A Repo handle is not safe to share between threads
+            with entry["lock"]:
+                yield entry["repo"]
+        finally:
+            with self._cond:
+                entry["in_use"] -= 1
+                entry["last_used"] = time.monotonic()
+                # Handles dropped by close() while in use are closed on release
+                if not entry["in_use"] and self._entries.get(key) is not entry:
+                    entry["repo"].close()
+                self._evict_idle(entry["last_used"])
+                self._cond.notify_all()
+
+    def evict_idle(self):
+        with self._cond:
+            self._evict_idle(time.monotonic())
+            self._cond.notify_all()
+
+    def close(self):
+        self._stop.set()
+        with self._cond:
+            self._closed = True
+            idle = [e for e in self._entries.values() if not e["in_use"]]
+            self._entries.clear()
+            self._cond.notify_all()
+        for entry in idle:
+            entry["repo"].close()
+
+    def _reap(self, interval):
+        while not self._stop.wait(interval):
+            self.evict_idle()
+
+    def _evict_idle(self, now):
+        # Called with the lock held; handles in use are never evicted
+        for key, entry in list(self._entries.items()):
+            if entry["in_use"]:
+                continue
+            if now - entry["last_used"] >= self.max_idle_seconds:
+                self._close_entry(key)
+
+    def _make_room(self):
+        # Called with the lock held; closes least-recently-used idle handles
+        # until a new one fits, and reports whether it does
+        for key, entry in list(self._entries.items()):
+            if len(self._entries) + self._opening < self.max_size:
+                break
+            if not entry["in_use"]:
+                self._close_entry(key)
+        return len(self._entries) + self._opening < self.max_size
+
+    def _checkout(self, key):
+        # Called with the lock held
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry["in_use"] += 1
+            self._entries.move_to_end(key)
+        return entry
+
+    def _close_entry(self, key):
+        self._entries.pop(key)["repo"].close()
+
+
+def repo_status(repo, repo_path, do_pull=False, do_force=False, any_branch=False):
+    # By default prefer 'main', then 'master', then the checked-out branch and
+    # compare against its own remote branch. With any_branch (the multi-repo
+    # scan behavior) use the checked-out branch and fall back to origin/main
+    # or origin/master when it has no remote counterpart.
     if repo.bare:
-        print("Repository is bare.")
-        sys.exit(1)
+        raise BareRepoError("Repository is bare.")
 
-    # Determine branch: prefer 'main', fallback to 'master'
     branch = None
-    for branch_name in ["main", "master"]:
+    if any_branch:
         try:
-            branch_ref = repo.heads[branch_name]
-            branch = branch_ref
-            break
-        except (IndexError, AttributeError, KeyError):
-            continue
+            branch = repo.active_branch
+        except Exception:
+            pass
     if branch is None:
+        for branch_name in ["main", "master"]:
+            try:
+                branch_ref = repo.heads[branch_name]
+                branch = branch_ref
+                break
+            except (IndexError, AttributeError, KeyError):
+                continue
+    if branch is None and not any_branch:
         # fallback to active_branch (for feature branches, etc.)
         try:
             branch = repo.active_branch
         except TypeError:
-            print("Detached HEAD state. Please checkout a branch.")
-            sys.exit(1)
+            pass
+    if branch is None:
+        raise DetachedHeadError("Detached HEAD state. Please checkout a branch.")
 
     remote_name = "origin"
     remote_branch = f"{remote_name}/{branch.name}"
@@ -76,29 +259,30 @@ def check_repo_status(repo_path=".", do_pull=False, do_force=False):
         except IndexError:
             available_remotes = [r.name for r in repo.remotes]
             if available_remotes:
-                print(
+                raise RemoteNotFoundError(
                     f"Error: Remote '{remote_name}' not found. Available remotes: {available_remotes}"
                 )
-            else:
-                print(
-                    f"Error: No git remotes found in this repository. Please add a remote named '{remote_name}' or specify an existing one."
-                )
-            sys.exit(1)
-        except GitCommandError as e:
-            print(f"Failed to fetch from remote: {e}")
-            sys.exit(1)
+            raise RemoteNotFoundError(
+                f"Error: No git remotes found in this repository. Please add a remote named '{remote_name}' or specify an existing one."
+            )
+        except Exception as e:
+            raise FetchError(f"Failed to fetch from remote: {e}")
 
     # Get commit objects
     try:
         repo.commit(branch.name)
     except Exception:
-        print(f"Local branch {branch.name} not found.")
-        sys.exit(1)
+        raise BranchNotFoundError(f"Local branch {branch.name} not found.")
     # Try remote branch for current branch, then fallback to origin/main or origin/master
     remote_commit = None
     remote_branch_candidates = [remote_branch]
+    if any_branch:
+        if branch.name != "main":
+            remote_branch_candidates.append(f"{remote_name}/main")
+        if branch.name != "master":
+            remote_branch_candidates.append(f"{remote_name}/master")
     # If current branch is main, try master as fallback; if master, try main as fallback
-    if branch.name == "main":
+    elif branch.name == "main":
         remote_branch_candidates.append(f"{remote_name}/master")
     elif branch.name == "master":
         remote_branch_candidates.append(f"{remote_name}/main")
@@ -110,47 +294,110 @@ def check_repo_status(repo_path=".", do_pull=False, do_force=False):
         except Exception:
             continue
     if remote_commit is None:
-        print(f"Remote branch {remote_branch} not found.")
-        sys.exit(1)
+        raise BranchNotFoundError(f"Remote branch {remote_branch} not found.")
 
     # Calculate ahead/behind
     ahead = sum(1 for _ in repo.iter_commits(f"{remote_branch}..{branch.name}"))
     behind = sum(1 for _ in repo.iter_commits(f"{branch.name}..{remote_branch}"))
 
+    # Check for staged, unstaged, and untracked changes
+    staged_changes = repo.index.diff("HEAD")
+    unstaged_changes = repo.index.diff(None)
+    untracked_files = repo.untracked_files
+
+    # Get last commit date in YYYY/MM/DD format
+    try:
+        last_commit_date = repo.head.commit.committed_datetime
+        last_activity_str = last_commit_date.strftime("%Y/%m/%d")
+    except Exception:
+        last_activity_str = "-"
+
+    # Perform pull if requested
+    pull_result = None
+    pull_error = None
+    if do_pull:
+        try:
+            pull_result = repo.remotes[remote_name].pull(branch.name)
+        except Exception as e:
+            pull_error = str(e)
+
+    return {
+        "name": os.path.basename(os.path.normpath(repo_path)),
+        "path": repo_path,
+        "branch": branch.name,
+        "remote_branch": remote_branch,
+        "ahead": ahead,
+        "behind": behind,
+        "staged": len(staged_changes),
+        "unstaged": len(unstaged_changes),
+        "untracked": len(untracked_files),
+        "untracked_files": list(untracked_files),
+        "cached": not fetch_needed,
+        "last_activity": last_activity_str,
+        "pull_result": pull_result,
+        "pull_error": pull_error,
+    }
+
+
+def get_repo_status(
+    repo_path=".", do_pull=False, do_force=False, any_branch=False, pool=None
+):
+    if pool is not None:
+        with pool.acquire(repo_path) as repo:
+            return repo_status(
+                repo,
+                repo_path,
+                do_pull=do_pull,
+                do_force=do_force,
+                any_branch=any_branch,
+            )
+    repo = open_repo(repo_path)
+    try:
+        return repo_status(
+            repo, repo_path, do_pull=do_pull, do_force=do_force, any_branch=any_branch
+        )
+    finally:
+        repo.close()
+
+
+def check_repo_status(repo_path=".", do_pull=False, do_force=False):
+    try:
+        status = get_repo_status(repo_path, do_pull=do_pull, do_force=do_force)
+    except RepoStatusError as e:
+        print(e)
+        sys.exit(1)
+
+    branch_name = status["branch"]
+    remote_branch = status["remote_branch"]
+    ahead = status["ahead"]
+    behind = status["behind"]
     if ahead == 0 and behind == 0:
-        print(f"Your branch '{branch.name}' is up to date with '{remote_branch}'.")
+        print(f"Your branch '{branch_name}' is up to date with '{remote_branch}'.")
     elif ahead > 0 and behind == 0:
         print(
-            f"Your branch '{branch.name}' is ahead of '{remote_branch}' by {ahead} commit(s). You may want to push."
+            f"Your branch '{branch_name}' is ahead of '{remote_branch}' by {ahead} commit(s). You may want to push."
         )
     elif ahead == 0 and behind > 0:
         print(
-            f"Your branch '{branch.name}' is behind '{remote_branch}' by {behind} commit(s). You may want to pull."
+            f"Your branch '{branch_name}' is behind '{remote_branch}' by {behind} commit(s). You may want to pull."
         )
     else:
         print(
             f"Your branch and '{remote_branch}' have diverged. Local is ahead by {ahead} and behind by {behind} commit(s). Consider merging or rebasing."
         )
 
-    # Check for staged, unstaged, and untracked changes
-    staged_changes = repo.index.diff("HEAD")
-    unstaged_changes = repo.index.diff(None)
-    untracked_files = repo.untracked_files
-
-    if staged_changes:
+    if status["staged"]:
         print("There are staged changes ready to be committed.")
-    if unstaged_changes:
+    if status["unstaged"]:
         print("There are unstaged changes in your working directory.")
-    if untracked_files:
-        print(f"There are untracked files: {', '.join(untracked_files)}")
-    if not staged_changes and not unstaged_changes and not untracked_files:
+    if status["untracked"]:
+        print(f"There are untracked files: {', '.join(status['untracked_files'])}")
+    if not status["staged"] and not status["unstaged"] and not status["untracked"]:
         print("Working directory clean (no staged, unstaged, or untracked changes).")
 
-    # Perform pull if requested
     if do_pull:
-        try:
-            print(f"Pulling from {remote_name}/{branch.name}...")
-            pull_info = repo.remotes[remote_name].pull(branch.name)
-            print(f"Pull result: {pull_info}")
-        except Exception as e:
-            print(f"Error during pull: {e}")
+        print(f"Pulling from origin/{branch_name}...")
+        if status["pull_error"] is not None:
+            print(f"Error during pull: {status['pull_error']}")
+        else:
+            print(f"Pull result: {status['pull_result']}")
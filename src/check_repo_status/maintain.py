@@ -0,0 +1,354 @@
+import os
+import sys
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from git import Repo, GitCommandError, InvalidGitRepositoryError, NoSuchPathError
+
+# Thresholds mirror git's own `gc --auto` defaults (gc.auto, gc.autoPackLimit)
+LOOSE_OBJECT_THRESHOLD = 6700
+PACK_THRESHOLD = 50
+# Index files above this size make every `git status` noticeably slower
+INDEX_SIZE_THRESHOLD = 16 * 1024 * 1024
+
+
+def resolve_git_dir(repo_path):
+    git_path = os.path.join(repo_path, ".git")
+    if os.path.isfile(git_path):
+        # Worktrees and submodules use a `gitdir: <path>` pointer file
+        try:
+            with open(git_path, "r") as f:
+                line = f.readline().strip()
+        except OSError:
+            return None
+        if line.startswith("gitdir:"):
+            git_dir = line[len("gitdir:") :].strip()
+            return os.path.normpath(os.path.join(repo_path, git_dir))
+        return None
+    if os.path.isdir(git_path):
+        return git_path
+    return None
+
+
+def resolve_common_dir(git_dir):
+    # Linked worktrees keep HEAD and the index in .git/worktrees/<name> but
+    # share objects and refs with the main repo named by their `commondir` file
+    try:
+        with open(os.path.join(git_dir, "commondir"), "r") as f:
+            common_dir = f.readline().strip()
+    except OSError:
+        return git_dir
+    return os.path.normpath(os.path.join(git_dir, common_dir))
+
+
+def is_git_dir(git_dir, common_dir):
+    # Same minimal layout git itself requires before treating a directory as a repo
+    return (
+        os.path.isfile(os.path.join(git_dir, "HEAD"))
+        and os.path.isdir(os.path.join(common_dir, "objects"))
+        and os.path.isdir(os.path.join(common_dir, "refs"))
+    )
+
+
+def count_loose_objects(objects_dir):
+    count = 0
+    try:
+        entries = os.listdir(objects_dir)
+    except OSError:
+        return 0
+    for entry in entries:
+        # Loose objects live in two-hex-digit fan-out directories
+        if len(entry) != 2:
+            continue
+        try:
+            count += len(os.listdir(os.path.join(objects_dir, entry)))
+        except OSError:
+            continue
+    return count
+
+
+def has_refs(common_dir):
+    # Stop at the first ref found; repos with many tags should stay cheap to check
+    try:
+        if os.path.getsize(os.path.join(common_dir, "packed-refs")) > 0:
+            return True
+    except OSError:
+        pass
+    for _, _, files in os.walk(os.path.join(common_dir, "refs")):
+        if files:
+            return True
+    return False
+
+
+def get_repo_health(repo_path):
+    git_dir = resolve_git_dir(repo_path)
+    if git_dir is None:
+        return None
+    common_dir = resolve_common_dir(git_dir)
+    if not is_git_dir(git_dir, common_dir):
+        return None
+    objects_dir = os.path.join(common_dir, "objects")
+    pack_dir = os.path.join(objects_dir, "pack")
+    try:
+        packs = [p for p in os.listdir(pack_dir) if p.endswith(".pack")]
+    except OSError:
+        packs = []
+    info_dir = os.path.join(objects_dir, "info")
+    has_commit_graph = os.path.exists(
+        os.path.join(info_dir, "commit-graph")
+    ) or os.path.isdir(os.path.join(info_dir, "commit-graphs"))
+    has_midx = os.path.exists(os.path.join(pack_dir, "multi-pack-index"))
+    try:
+        index_size = os.path.getsize(os.path.join(git_dir, "index"))
+    except OSError:
+        index_size = 0
+    loose_objects = count_loose_objects(objects_dir)
+    return {
+        "name": os.path.basename(os.path.normpath(repo_path)),
+        "path": repo_path,
+        "common_dir": common_dir,
+        # Unborn or empty repos have nothing to write a commit-graph for
+        "empty": (loose_objects == 0 and not packs) or not has_refs(common_dir),
+        "loose_objects": loose_objects,
+        "packs": len(packs),
+        "commit_graph": has_commit_graph,
+        "midx": has_midx,
+        "index_size": index_size,
+    }
+
+
+def estimate_status_cost(health):
+    # Rough relative weight of what `git status` and ahead/behind walks pay for
+    cost = health["loose_objects"] / 100
+    cost += health["packs"] * 5
+    cost += health["index_size"] / (1024 * 1024)
+    if not health["commit_graph"] and not health["empty"]:
+        cost += 20
+    if health["packs"] > 1 and not health["midx"]:
+        cost += health["packs"]
+    return round(cost, 1)
+
+
+def plan_maintenance(health):
+    actions = []
+    if health["packs"] >= PACK_THRESHOLD:
+        actions.append("repack-all")
+    elif health["loose_objects"] >= LOOSE_OBJECT_THRESHOLD:
+        actions.append("repack")
+    if (not health["commit_graph"] and not health["empty"]) or actions:
+        actions.append("commit-graph")
+    # A full repack leaves a single pack, so a multi-pack-index buys nothing
+    if "repack-all" not in actions and (
+        (health["packs"] > 1 and not health["midx"]) or "repack" in actions
+    ):
+        actions.append("midx")
+    return actions
+
+
+def find_upstream(git):
+    # Same comparison target as the status scan: the tracked branch, else origin's default
+    for ref in ["@{upstream}", "origin/HEAD", "origin/main", "origin/master"]:
+        try:
+            git.rev_parse("--verify", "-q", ref)
+            return ref
+        except GitCommandError:
+            continue
+    return None
+
+
+def time_status_scan(repo_path, runs=3):
+    # Times what a status scan pays for: `git status` plus the ahead/behind
+    # history walks, which is where the commit-graph and MIDX gains show up
+    try:
+        repo = Repo(repo_path)
+    except (InvalidGitRepositoryError, NoSuchPathError):
+        return None
+    try:
+        git = repo.git
+        upstream = find_upstream(git)
+
+        def scan():
+            git.status("--porcelain")
+            if upstream:
+                git.rev_list("--count", f"{upstream}..HEAD")
+                git.rev_list("--count", f"HEAD..{upstream}")
+
+        # Warm-up run so before and after are both measured with a warm cache
+        scan()
+        best = None
+        for _ in range(runs):
+            start = time.perf_counter()
+            scan()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+    except GitCommandError:
+        return None
+    finally:
+        repo.close()
+
+
+def run_maintenance(repo_path, actions, threads=1, io_lock=None):
+    done = []
+    repo = None
+    try:
+        repo = Repo(repo_path)
+        git = repo.git
+        for action in actions:
+            if action in ("repack", "repack-all"):
+                args = ["-d", "-q", f"--threads={threads}"]
+                if action == "repack-all":
+                    args.insert(0, "-a")
+                # Repacks are the IO-heavy step; only run as many as the budget allows
+                if io_lock is not None:
+                    with io_lock:
+                        git.repack(*args)
+                else:
+                    git.repack(*args)
+            elif action == "commit-graph":
+                git.execute(["git", "commit-graph", "write", "--reachable"])
+            elif action == "midx":
+                git.execute(["git", "multi-pack-index", "write"])
+            done.append(action)
+    except (InvalidGitRepositoryError, NoSuchPathError) as e:
+        return done, f"Error: not a git repository: {e}"
+    except GitCommandError as e:
+        return done, f"Error: {e.stderr.strip() if e.stderr else e}"
+    finally:
+        if repo is not None:
+            repo.close()
+    return done, None
+
+
+def find_repos(parent_dir):
+    return [
+        os.path.join(parent_dir, d)
+        for d in sorted(os.listdir(parent_dir))
+        if os.path.isdir(os.path.join(parent_dir, d))
+    ]
+
+
+def report_maintenance(parent_dir, jobs=None, io_jobs=1, dry_run=False, cpus=None):
+    cpus = max(1, cpus or os.cpu_count() or 1)
+    jobs = max(1, min(jobs or cpus, cpus))
+    io_jobs = max(1, min(io_jobs, jobs))
+    # Split the CPU budget between the repos being maintained concurrently
+    threads = max(1, cpus // jobs)
+
+    healths = []
+    for subdir in find_repos(parent_dir):
+        health = get_repo_health(subdir)
+        if health:
+            health["cost"] = estimate_status_cost(health)
+            health["actions"] = plan_maintenance(health)
+            healths.append(health)
+    # Most expensive repos first so they get a worker as early as possible
+    healths.sort(key=lambda h: (-h["cost"], h["name"]))
+    # Worktrees share their main repo's objects; maintain each object store once
+    seen_common_dirs = set()
+    for h in healths:
+        common_dir = os.path.realpath(h["common_dir"])
+        if common_dir in seen_common_dirs:
+            h["actions"] = []
+        seen_common_dirs.add(common_dir)
+
+    for h in healths:
+        h["before"] = None
+        h["after"] = None
+        h["done"] = []
+        h["error"] = None
+
+    todo = [h for h in healths if h["actions"]]
+    if not dry_run and todo:
+        io_lock = threading.BoundedSemaphore(io_jobs)
+        total = len(todo)
+        counter = {"n": 0}
+        progress_lock = threading.Lock()
+
+        def work(h):
+            h["before"] = time_status_scan(h["path"])
+            h["done"], h["error"] = run_maintenance(
+                h["path"], h["actions"], threads=threads, io_lock=io_lock
+            )
+            h["after"] = time_status_scan(h["path"])
+            with progress_lock:
+                counter["n"] += 1
+                sys.stdout.write(
+                    f"Maintained repo {counter['n']}/{total}: {h['name']}...\r"
+                )
+                sys.stdout.flush()
+
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            list(pool.map(work, todo))
+        sys.stdout.write(" " * 80 + "\r")  # Clear the progress line
+        sys.stdout.flush()
+
+    def fmt_seconds(value):
+        return f"{value * 1000:.0f}ms" if value is not None else "-"
+
+    header = "| Repo                 | Loose  | Packs | CG  | MIDX | Index  | Cost   | Actions                        | Before  | After   |"
+    sep = "|----------------------+--------+-------+-----+------+--------+--------+--------------------------------+---------+---------|"
+    print(header)
+    print(sep)
+    for h in healths:
+        repo_name = h["name"][:20]
+        cg = "yes" if h["commit_graph"] else "no"
+        midx = "yes" if h["midx"] else "no"
+        index_col = f"{h['index_size'] // 1024}K"
+        actions = h["done"] if not dry_run else h["actions"]
+        actions_col = ",".join(actions) if actions else "-"
+        if h["error"]:
+            actions_col = h["error"]
+        actions_col = actions_col[:30]
+        print(
+            f"| {repo_name:<20} | {h['loose_objects']:<6} | {h['packs']:<5} | {cg:<3} | {midx:<4} | {index_col:<6} | {h['cost']:<6} | {actions_col:<30} | {fmt_seconds(h['before']):<7} | {fmt_seconds(h['after']):<7} |"
+        )
+
+    # Only maintained repos are timed; the rest would cost a scan for nothing
+    timed = [h for h in todo if h["before"] is not None and h["after"] is not None]
+    if timed:
+        before_total = sum(h["before"] for h in timed)
+        after_total = sum(h["after"] for h in timed)
+        print(f"\nStatus scan before: {before_total:.2f}s ({len(timed)} repos)")
+        print(f"Status scan after:  {after_total:.2f}s")
+    return healths
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Check subfolder git repos for status-slowing health issues and fix them."
+    )
+    parser.add_argument("parent_dir", help="Directory containing subfolders to check.")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of repos to maintain in parallel (default: --cpus).",
+    )
+    parser.add_argument(
+        "--cpus",
+        type=int,
+        default=None,
+        help="Total CPU cores to use, split between the parallel repos (CPU budget, default: CPU count).",
+    )
+    parser.add_argument(
+        "--io-jobs",
+        type=int,
+        default=1,
+        help="Maximum number of concurrent repacks (IO budget, default: 1).",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only report repo health and planned actions.",
+    )
+    args = parser.parse_args()
+    report_maintenance(
+        args.parent_dir,
+        jobs=args.jobs,
+        io_jobs=args.io_jobs,
+        cpus=args.cpus,
+        dry_run=args.dry_run,
+    )
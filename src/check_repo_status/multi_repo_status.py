@@ -1,188 +1,169 @@
 import os
-from git import Repo, GitCommandError, InvalidGitRepositoryError
-from check_repo_status import should_fetch, update_fetch_cache
+import argparse
+import hashlib
+import json
+from check_repo_status import RepoStatusError, get_repo_status
 import sys
 from datetime import datetime, timedelta
 
 
 def get_repo_status_summary(repo_path, do_pull=False, do_force=False):
     try:
-        repo = Repo(repo_path)
-    except (InvalidGitRepositoryError, GitCommandError, Exception):
-        return None
-    if repo.bare:
-        return None
-    # Always use the current active branch
-    try:
-        branch = repo.active_branch
-    except Exception:
-        # Fallback: try 'main' or 'master' if active branch is unavailable (detached HEAD)
-        branch = None
-        for branch_name in ["main", "master"]:
-            try:
-                branch_ref = repo.heads[branch_name]
-                branch = branch_ref
-                break
-            except (IndexError, AttributeError, KeyError):
-                continue
-        if branch is None:
-            return None
-    remote_name = "origin"
-    remote_branch = f"{remote_name}/{branch.name}"
-    # Use fetch cache
-    cache_seconds = int(os.environ.get("GIT_FETCH_CACHE_SECONDS", "600"))
-    fetch_needed = do_force or should_fetch(repo_path, remote_name, cache_seconds)
-    cache_hit = False
-    if fetch_needed:
-        try:
-            repo.remotes[remote_name].fetch()
-            update_fetch_cache(repo_path, remote_name)
-        except Exception:
-            return None
-    else:
-        cache_hit = True
-    # Try remote branch for current branch, then fallback to origin/main or origin/master
-    remote_commit = None
-    remote_branch_candidates = [remote_branch]
-    # Fallbacks for legacy support
-    if branch.name != "main":
-        remote_branch_candidates.append(f"{remote_name}/main")
-    if branch.name != "master":
-        remote_branch_candidates.append(f"{remote_name}/master")
-    for rb in remote_branch_candidates:
-        try:
-            remote_commit = repo.commit(rb)
-            remote_branch = rb
-            break
-        except Exception:
-            continue
-    if remote_commit is None:
+        status = get_repo_status(
+            repo_path, do_pull=do_pull, do_force=do_force, any_branch=True
+        )
+    except RepoStatusError:
         return None
-    ahead = sum(1 for _ in repo.iter_commits(f"{remote_branch}..{branch.name}"))
-    behind = sum(1 for _ in repo.iter_commits(f"{branch.name}..{remote_branch}"))
-    staged = len(repo.index.diff("HEAD"))
-    unstaged = len(repo.index.diff(None))
-    untracked = len(repo.untracked_files)
-
-    # Get last commit date in YYYY/MM/DD format
-    try:
-        last_commit_date = repo.head.commit.committed_datetime
-        last_activity_str = last_commit_date.strftime("%Y/%m/%d")
-    except Exception:
-        last_activity_str = "-"
-
-    # Perform pull if requested
-    pull_result = None
-    if do_pull:
-        try:
-            pull_result = repo.remotes[remote_name].pull(branch.name)
-        except Exception as e:
-            pull_result = f"Error: {e}"
-
+    pull_result = status["pull_result"]
+    if status["pull_error"] is not None:
+        pull_result = f"Error: {status['pull_error']}"
     return {
         "name": os.path.basename(repo_path),
-        "branch": branch.name,
-        "ahead": ahead,
-        "behind": behind,
-        "staged": staged,
-        "unstaged": unstaged,
-        "untracked": untracked,
-        "cached": cache_hit,
+        "branch": status["branch"],
+        "ahead": status["ahead"],
+        "behind": status["behind"],
+        "staged": status["staged"],
+        "unstaged": status["unstaged"],
+        "untracked": status["untracked"],
+        "cached": status["cached"],
         "pull_result": pull_result,
-        "last_activity": last_activity_str,
+        "last_activity": status["last_activity"],
     }
 
 
-def report_multi_repo_status(
-    parent_dir, do_pull=False, do_force=False, recent_only=False
+def parse_shard(spec):
+    # "i/N" with 1 <= i <= N, e.g. "2/4" is the second of four shards
+    try:
+        index, count = (int(part) for part in spec.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid shard '{spec}', expected i/N")
+    if count < 1 or not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(
+            f"invalid shard '{spec}', i must be between 1 and N"
+        )
+    return index, count
+
+
+def shard_of(repo_name, count):
+    # Stable across processes and hosts (unlike hash()), and per-repo, so
+    # adding or removing a repo never moves any other repo to another shard
+    digest = hashlib.sha1(repo_name.encode("utf-8")).hexdigest()
+    return int(digest, 16) % count + 1
+
+
+def collect_repo_statuses(
+    parent_dir, do_pull=False, do_force=False, shard=None, show_progress=True
 ):
     subdirs = [
         os.path.join(parent_dir, d)
         for d in os.listdir(parent_dir)
         if os.path.isdir(os.path.join(parent_dir, d))
     ]
+    if shard is not None:
+        index, count = shard
+        subdirs = [d for d in subdirs if shard_of(os.path.basename(d), count) == index]
     results = []
     total = len(subdirs)
     for idx, subdir in enumerate(subdirs, 1):
-        sys.stdout.write(
-            f"Checking repo {idx}/{total}: {os.path.basename(subdir)}...\r"
-        )
-        sys.stdout.flush()
+        if show_progress:
+            sys.stdout.write(
+                f"Checking repo {idx}/{total}: {os.path.basename(subdir)}...\r"
+            )
+            sys.stdout.flush()
         status = get_repo_status_summary(subdir, do_pull=do_pull, do_force=do_force)
         if status:
             results.append(status)
-    sys.stdout.write(" " * 80 + "\r")  # Clear the progress line
-    sys.stdout.flush()
-
-    # Helper to compute status symbol
-    def compute_status(staged, unstaged, untracked):
-        if staged and unstaged:
-            status = "SU"
-        elif staged:
-            status = "S"
-        elif unstaged:
-            status = "U"
-        elif untracked:
-            status = "?"
-        else:
-            status = "✔"
-        if untracked and (staged or unstaged):
-            status += "?"
-        return status
-
-    def is_remarkable(r):
-        return compute_status(r["staged"], r["unstaged"], r["untracked"]) != "✔"
-
-    def parse_last_activity(r):
-        try:
-            return datetime.strptime(r.get("last_activity", ""), "%Y/%m/%d")
-        except Exception:
-            return datetime.min
+    if show_progress:
+        sys.stdout.write(" " * 80 + "\r")  # Clear the progress line
+        sys.stdout.flush()
+    return results
+
+
+def compute_status(staged, unstaged, untracked):
+    if staged and unstaged:
+        status = "SU"
+    elif staged:
+        status = "S"
+    elif unstaged:
+        status = "U"
+    elif untracked:
+        status = "?"
+    else:
+        status = "✔"
+    if untracked and (staged or unstaged):
+        status += "?"
+    return status
+
+
+def is_remarkable(r):
+    return compute_status(r["staged"], r["unstaged"], r["untracked"]) != "✔"
 
+
+def parse_last_activity(r):
+    try:
+        return datetime.strptime(r.get("last_activity", ""), "%Y/%m/%d")
+    except Exception:
+        return datetime.min
+
+
+def format_pull_result(pull_result):
+    # Format pull result for user-friendly output
+    if pull_result is None:
+        return ""
+    if isinstance(pull_result, list) and pull_result:
+        changes = []
+        for info in pull_result:
+            if hasattr(info, "ref") and hasattr(info, "note"):
+                changes.append(
+                    f"{getattr(info, 'ref', '?')}: {getattr(info, 'note', '')}"
+                )
+        if changes:
+            return ", ".join(changes)
+    return "OK"
+
+
+def sort_results(results, recent_only=False):
     # Filter for recent-only if flag is set
     if recent_only:
         three_months_ago = datetime.now() - timedelta(days=90)
         results = [r for r in results if parse_last_activity(r) >= three_months_ago]
     # Sort: remarkable first, then by last_activity desc, then by name
-    results.sort(
+    return sorted(
+        results,
         key=lambda r: (
             not is_remarkable(r),
             -parse_last_activity(r).timestamp(),
             r["name"],
-        )
+        ),
     )
+
+
+def to_report_entry(r):
+    # Plain JSON-safe record; pull results are GitPython objects until formatted
+    entry = {k: v for k, v in r.items() if k != "pull_result"}
+    entry["pull"] = (
+        r["pull"] if "pull" in r else format_pull_result(r.get("pull_result"))
+    )
+    entry["status"] = compute_status(r["staged"], r["unstaged"], r["untracked"])
+    return entry
+
+
+def print_status_table(results):
     # Print org-mode table
     header = "| Repo                 | Ahead | Behind | Status | Last Activity | Pull                | Branch               | Cached  |"
     sep = "|----------------------+-------+--------+--------+---------------+---------------------+---------------------+---------|"
     print(header)
     print(sep)
     for r in results:
+        entry = to_report_entry(r)
         ahead = str(r["ahead"]) if r["ahead"] else "-"
         behind = str(r["behind"]) if r["behind"] else "-"
         cached = "cached" if r.get("cached") else ""
         branch = str(r.get("branch", "-"))[:20]  # Truncate to 20 chars, fixed width
         repo_name = r["name"][:20]  # Truncate to 20 chars
-        status = compute_status(r["staged"], r["unstaged"], r["untracked"])
         last_activity_col = r.get("last_activity", "-")
-        # Format pull result for user-friendly output
-        pull_result = r.get("pull_result")
-        pull_col = ""
-        if pull_result is not None:
-            if isinstance(pull_result, list) and pull_result:
-                changes = []
-                for info in pull_result:
-                    if hasattr(info, "ref") and hasattr(info, "note"):
-                        changes.append(
-                            f"{getattr(info, 'ref', '?')}: {getattr(info, 'note', '')}"
-                        )
-                if changes:
-                    pull_col = ", ".join(changes)
-                else:
-                    pull_col = "OK"
-            else:
-                pull_col = "OK"
         print(
-            f"| {repo_name:<20} | {ahead:<5} | {behind:<6} | {status:<6} | {last_activity_col:<13} | {pull_col:<19} | {branch:<20} | {cached:<7} |"
+            f"| {repo_name:<20} | {ahead:<5} | {behind:<6} | {entry['status']:<6} | {last_activity_col:<13} | {entry['pull']:<19} | {branch:<20} | {cached:<7} |"
         )
     # Print legend for Status column
     print("\nLegend for Status column:")
@@ -192,13 +173,110 @@ def report_multi_repo_status(
     print("  ?  = Untracked files only")
 
 
-if __name__ == "__main__":
-    import argparse
+def print_report(results, recent_only=False, as_json=False):
+    results = sort_results(results, recent_only=recent_only)
+    if as_json:
+        print(json.dumps([to_report_entry(r) for r in results], indent=2))
+    else:
+        print_status_table(results)
+
+
+def write_partial(path, results, shard=None):
+    partial = {
+        "shard": list(shard) if shard else [1, 1],
+        "results": [to_report_entry(r) for r in results],
+    }
+    # Write to a temp file and rename so a merge never reads a half-written partial
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump(partial, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def merge_partials(paths):
+    results = {}
+    seen_shards = set()
+    count = None
+    for path in paths:
+        try:
+            with open(path, "r") as f:
+                partial = json.load(f)
+            index, shard_count = partial["shard"]
+            partial_results = {r["name"]: r for r in partial["results"]}
+        except OSError as e:
+            raise ValueError(f"Could not read partial '{path}': {e.strerror}")
+        except (ValueError, KeyError, TypeError) as e:
+            raise ValueError(f"Malformed partial '{path}': {e}")
+        if count is None:
+            count = shard_count
+        elif shard_count != count:
+            raise ValueError(
+                f"Partial '{path}' is shard {index}/{shard_count}, expected N={count}."
+            )
+        # Without a coordinator the merge is the only place a stale file or
+        # a wrong --shard can be caught, so refuse to silently pick one
+        if index in seen_shards:
+            raise ValueError(
+                f"Partial '{path}' is shard {index}/{shard_count}, which is already merged."
+            )
+        duplicates = sorted(set(partial_results) & set(results))
+        if duplicates:
+            raise ValueError(
+                f"Partial '{path}' repeats repo(s) already merged: {', '.join(duplicates)}."
+            )
+        seen_shards.add(index)
+        results.update(partial_results)
+    if count is not None:
+        missing = sorted(set(range(1, count + 1)) - seen_shards)
+        if missing:
+            sys.stderr.write(
+                f"Warning: missing partials for shard(s) {', '.join(map(str, missing))} of {count}.\n"
+            )
+    return list(results.values())
+
+
+def report_multi_repo_status(
+    parent_dir,
+    do_pull=False,
+    do_force=False,
+    recent_only=False,
+    shard=None,
+    partial_out=None,
+    as_json=False,
+):
+    results = collect_repo_statuses(
+        parent_dir,
+        do_pull=do_pull,
+        do_force=do_force,
+        shard=shard,
+        show_progress=not as_json,
+    )
+    if partial_out:
+        write_partial(partial_out, results, shard=shard)
+        return
+    print_report(results, recent_only=recent_only, as_json=as_json)
+
 
+def report_merged_status(partial_paths, recent_only=False, as_json=False):
+    print_report(
+        merge_partials(partial_paths), recent_only=recent_only, as_json=as_json
+    )
+
+
+if __name__ == "__main__":
     parser = argparse.ArgumentParser(
         description="Check all subfolders for git repo status."
     )
-    parser.add_argument("parent_dir", help="Directory containing subfolders to check.")
+    parser.add_argument(
+        "parent_dir", nargs="?", help="Directory containing subfolders to check."
+    )
     parser.add_argument(
         "--pull",
         action="store_true",
@@ -214,10 +292,56 @@ if __name__ == "__main__":
         action="store_true",
         help="Only show repos with activity in the last 3 months.",
     )
-    args = parser.parse_args()
-    report_multi_repo_status(
-        args.parent_dir,
-        do_pull=args.pull,
-        do_force=args.no_cache,
-        recent_only=args.recent_only,
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        default=None,
+        help="Only check shard i of N (e.g. 2/4), split by a hash of the repo name.",
+    )
+    parser.add_argument(
+        "--partial-out",
+        default=None,
+        help="Write a partial result file for a later --merge instead of printing.",
     )
+    parser.add_argument(
+        "--merge",
+        nargs="+",
+        default=None,
+        metavar="PARTIAL",
+        help="Merge partial result files into a single report.",
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Print the report as JSON instead of an org-mode table.",
+    )
+    args = parser.parse_args()
+    if args.merge:
+        if args.parent_dir:
+            parser.error("parent_dir cannot be combined with --merge")
+        for option, value in [
+            ("--shard", args.shard),
+            ("--partial-out", args.partial_out),
+            ("--pull", args.pull),
+            ("--no-cache", args.no_cache),
+        ]:
+            if value:
+                parser.error(f"{option} cannot be combined with --merge")
+        try:
+            report_merged_status(
+                args.merge, recent_only=args.recent_only, as_json=args.json
+            )
+        except ValueError as e:
+            parser.error(str(e))
+    elif args.parent_dir:
+        report_multi_repo_status(
+            args.parent_dir,
+            do_pull=args.pull,
+            do_force=args.no_cache,
+            recent_only=args.recent_only,
+            shard=args.shard,
+            partial_out=args.partial_out,
+            as_json=args.json,
+        )
+    else:
+        parser.error("parent_dir is required unless --merge is given")
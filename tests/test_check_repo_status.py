@@ -2,6 +2,9 @@ from unittest.mock import patch, MagicMock
 from io import StringIO
 import sys
 import subprocess
+import argparse
+import json
+import pytest
 from check_repo_status import check_repo_status
 from datetime import datetime
 
@@ -201,7 +204,7 @@ def make_fake_repo(ahead=0, behind=0, staged=0, unstaged=0, name='repo'):
 
 @patch('os.listdir')
 @patch('os.path.isdir')
-@patch('check_repo_status.multi_repo_status.Repo')
+@patch('check_repo_status.Repo')
 def test_multi_repo_status_table(mock_repo, mock_isdir, mock_listdir):
     from check_repo_status.multi_repo_status import report_multi_repo_status
     # Simulate three subdirs
@@ -280,4 +283,264 @@ def test_fallback_to_active_branch(mock_repo):
         out = fake_out.getvalue()
         assert "up to date" in out
         assert "feature-branch" in out
-        assert "Working directory clean" in out 
\ No newline at end of file
+        assert "Working directory clean" in out
+
+def make_git_repo(path, commits=1):
+    git = ['git', '-c', 'user.name=t', '-c', 'user.email=t@t']
+    subprocess.run(['git', 'init', '-q', '-b', 'main', str(path)], check=True)
+    for i in range(commits):
+        (path / f"f{i}").write_text(str(i))
+        subprocess.run(git + ['add', '.'], cwd=path, check=True)
+        subprocess.run(git + ['commit', '-qm', str(i)], cwd=path, check=True)
+    return str(path)
+
+def make_clones(tmp_path, names, parent=None):
+    origin = make_git_repo(tmp_path / "origin")
+    parent = parent or tmp_path
+    paths = []
+    for name in names:
+        subprocess.run(['git', 'clone', '-q', origin, str(parent / name)], check=True)
+        paths.append(str(parent / name))
+    return paths
+
+def test_repo_health_metrics(tmp_path):
+    from check_repo_status.maintain import get_repo_health, estimate_status_cost
+    objects = tmp_path / "repo" / ".git" / "objects"
+    for fanout, names in [("ab", ["1", "2"]), ("cd", ["3"])]:
+        (objects / fanout).mkdir(parents=True)
+        for n in names:
+            (objects / fanout / n).write_text("")
+    (objects / "pack").mkdir()
+    (objects / "pack" / "pack-1.pack").write_text("")
+    (objects / "pack" / "pack-2.pack").write_text("")
+    (objects / "info").mkdir()
+    (objects / "info" / "commit-graph").write_text("")
+    (tmp_path / "repo" / ".git" / "refs" / "heads").mkdir(parents=True)
+    (tmp_path / "repo" / ".git" / "refs" / "heads" / "main").write_text("0" * 40)
+    (tmp_path / "repo" / ".git" / "HEAD").write_text("ref: refs/heads/main\n")
+    (tmp_path / "repo" / ".git" / "index").write_bytes(b"x" * 2048)
+    health = get_repo_health(str(tmp_path / "repo"))
+    assert health["loose_objects"] == 3
+    assert health["packs"] == 2
+    assert health["commit_graph"] and not health["midx"]
+    assert health["index_size"] == 2048
+    assert get_repo_health(str(tmp_path)) is None
+    # An empty .git folder is not a repo
+    (tmp_path / "empty" / ".git").mkdir(parents=True)
+    assert get_repo_health(str(tmp_path / "empty")) is None
+    # Missing commit-graph makes a repo rank as more expensive
+    assert estimate_status_cost(dict(health, commit_graph=False)) > estimate_status_cost(health)
+
+def test_plan_maintenance():
+    from check_repo_status.maintain import plan_maintenance
+    healthy = {"empty": False, "loose_objects": 10, "packs": 1, "commit_graph": True, "midx": False, "index_size": 0}
+    assert plan_maintenance(healthy) == []
+    assert plan_maintenance(dict(healthy, commit_graph=False)) == ["commit-graph"]
+    assert plan_maintenance(dict(healthy, packs=3)) == ["midx"]
+    assert plan_maintenance(dict(healthy, loose_objects=10000)) == ["repack", "commit-graph", "midx"]
+    assert plan_maintenance(dict(healthy, packs=60)) == ["repack-all", "commit-graph"]
+    # Unborn repos never get a commit-graph, so they must not be re-planned every run
+    assert plan_maintenance(dict(healthy, empty=True, commit_graph=False)) == []
+
+def test_report_maintenance_repacks(tmp_path):
+    from check_repo_status import maintain
+    repo_dir = make_git_repo(tmp_path / "repo1", commits=3)
+    subprocess.run(['git', 'init', '-q', str(tmp_path / "unborn")], check=True)
+    with patch.object(maintain, 'LOOSE_OBJECT_THRESHOLD', 1), patch('sys.stdout', new=StringIO()) as fake_out:
+        healths = maintain.report_maintenance(str(tmp_path), jobs=2, cpus=1)
+        out = fake_out.getvalue()
+    assert healths[0]["done"] == ["repack", "commit-graph", "midx"]
+    assert healths[0]["before"] is not None and healths[0]["after"] is not None
+    unborn = next(h for h in healths if h["name"] == "unborn")
+    assert unborn["empty"] and unborn["actions"] == [] and unborn["before"] is None
+    assert "Status scan after" in out
+    health = maintain.get_repo_health(repo_dir)
+    assert health["loose_objects"] == 0
+    assert health["packs"] == 1 and health["commit_graph"] and health["midx"]
+
+def test_shard_assignment_is_stable():
+    from check_repo_status.multi_repo_status import shard_of, parse_shard
+    names = [f"repo{i}" for i in range(50)]
+    shards = {n: shard_of(n, 4) for n in names}
+    assert set(shards.values()) == {1, 2, 3, 4}
+    # Assignment depends only on the repo name, so adding repos never moves others
+    assert all(shard_of(n, 4) == shards[n] for n in names)
+    assert parse_shard("2/4") == (2, 4)
+    for bad in ["0/4", "5/4", "2", "a/b"]:
+        with pytest.raises(argparse.ArgumentTypeError, match="invalid shard"):
+            parse_shard(bad)
+
+def test_sharded_scan_and_merge(tmp_path):
+    parent = tmp_path / "repos"
+    names = [f"repo{i}" for i in range(6)]
+    make_clones(tmp_path, names, parent=parent)
+    (parent / "repo0" / "dirty").write_text("x")
+    partials = []
+    procs = []
+    for i in range(1, 4):
+        partial = tmp_path / f"part{i}.json"
+        partials.append(str(partial))
+        procs.append(subprocess.Popen([
+            sys.executable, '-m', 'check_repo_status.multi_repo_status', str(parent),
+            '--shard', f'{i}/3', '--partial-out', str(partial),
+        ], stdout=subprocess.DEVNULL))
+    assert all(p.wait() == 0 for p in procs)
+    shard_names = [[r["name"] for r in json.loads(open(p).read())["results"]] for p in partials]
+    assert sorted(sum(shard_names, [])) == names
+    result = subprocess.run([
+        sys.executable, '-m', 'check_repo_status.multi_repo_status', '--json', '--merge', *partials,
+    ], capture_output=True, text=True, check=True)
+    report = json.loads(result.stdout)
+    assert sorted(r["name"] for r in report) == names
+    # Dirty repos still sort first after the merge
+    assert report[0]["name"] == "repo0" and report[0]["status"] == "?"
+    result = subprocess.run([
+        sys.executable, '-m', 'check_repo_status.multi_repo_status', '--merge', *partials[:2],
+    ], capture_output=True, text=True, check=True)
+    assert "| Repo" in result.stdout
+    assert "missing partials for shard(s) 3 of 3" in result.stderr
+
+def test_get_repo_status_returns_and_raises(tmp_path):
+    from check_repo_status import get_repo_status, RepoNotFoundError
+    (repo_path,) = make_clones(tmp_path, ['clone'])
+    (tmp_path / 'clone' / 'new.txt').write_text('x')
+    status = get_repo_status(repo_path)
+    assert status["branch"] == "main" and status["remote_branch"] == "origin/main"
+    assert status["ahead"] == 0 and status["behind"] == 0
+    assert status["untracked_files"] == ["new.txt"]
+    with pytest.raises(RepoNotFoundError, match="Could not open the repository"):
+        get_repo_status(str(tmp_path / 'missing'))
+
+def test_repo_pool_reuses_and_evicts(tmp_path):
+    from check_repo_status import RepoPool, get_repo_status
+    paths = make_clones(tmp_path, ['a', 'b', 'c'])
+    with RepoPool(max_size=2) as pool:
+        with pool.acquire(paths[0]) as first:
+            pass
+        with pool.acquire(paths[0]) as again:
+            assert again is first
+        get_repo_status(paths[1], pool=pool)
+        # 'a' was used less recently than 'b', so it is evicted for 'c'
+        get_repo_status(paths[2], pool=pool)
+        assert len(pool) == 2
+        assert paths[0] not in pool and paths[1] in pool and paths[2] in pool
+    assert len(pool) == 0
+    pool = RepoPool(max_idle_seconds=0)
+    get_repo_status(paths[0], pool=pool)
+    pool.evict_idle()
+    assert len(pool) == 0
+
+def test_repo_pool_caps_open_handles(tmp_path):
+    import threading
+    import time
+    from check_repo_status import RepoPool, PoolClosedError, get_repo_status
+    paths = make_clones(tmp_path, ['a', 'b'])
+    pool = RepoPool(max_size=1)
+    acquired = threading.Event()
+
+    def use_b():
+        with pool.acquire(paths[1]):
+            acquired.set()
+
+    with pool.acquire(paths[0]):
+        worker = threading.Thread(target=use_b)
+        worker.start()
+        # The only slot is in use, so the second repo waits for it
+        assert not acquired.wait(0.2)
+        assert len(pool) == 1
+    worker.join(5)
+    assert acquired.is_set()
+    assert paths[1] in pool and len(pool) == 1
+    # A thread querying a repo it already holds reuses the handle instead of deadlocking
+    results = []
+
+    def query_held_repo():
+        with pool.acquire(paths[1]):
+            results.append(get_repo_status(paths[1], pool=pool))
+
+    nested = threading.Thread(target=query_held_repo, daemon=True)
+    nested.start()
+    nested.join(5)
+    assert not nested.is_alive() and results[0]["branch"] == "main"
+    # Closing the pool mid-query leaves the handle usable until it is released
+    with pool.acquire(paths[1]) as repo:
+        pool.close()
+        assert repo.head.commit.hexsha
+    with pytest.raises(PoolClosedError):
+        with pool.acquire(paths[1]):
+            pass
+    # The reaper thread closes idle handles without further pool calls
+    with RepoPool(max_idle_seconds=0.1, reap_interval=0.01) as pool:
+        with pool.acquire(paths[0]):
+            pass
+        assert len(pool) == 1
+        deadline = time.monotonic() + 5
+        while len(pool) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(pool) == 0
+
+def test_report_maintenance_skips_broken_repos(tmp_path):
+    from check_repo_status import maintain
+    make_git_repo(tmp_path / "good")
+    (tmp_path / "broken").mkdir()
+    (tmp_path / "broken" / ".git").write_text("gitdir: /nonexistent\n")
+    (tmp_path / "empty" / ".git").mkdir(parents=True)
+    with patch('sys.stdout', new=StringIO()):
+        healths = maintain.report_maintenance(str(tmp_path), dry_run=True)
+    # Dry runs only gather metrics; no status scans are timed
+    assert healths[0]["actions"] == ["commit-graph"] and healths[0]["before"] is None
+    with patch('sys.stdout', new=StringIO()) as fake_out:
+        healths = maintain.report_maintenance(str(tmp_path))
+        out = fake_out.getvalue()
+    assert [h["name"] for h in healths] == ["good"]
+    assert healths[0]["done"] == ["commit-graph"]
+    assert "Status scan after" in out
+    # A repo that disappears after planning is reported on its row, not raised
+    done, error = maintain.run_maintenance(str(tmp_path / "broken"), ["commit-graph"])
+    assert done == [] and "not a git repository" in error
+
+def test_worktree_health_uses_common_dir(tmp_path):
+    from check_repo_status import maintain
+    repo_dir = make_git_repo(tmp_path / "main")
+    subprocess.run(['git', 'commit-graph', 'write', '--reachable'], cwd=repo_dir, check=True)
+    subprocess.run(['git', 'worktree', 'add', '-q', str(tmp_path / "wt")], cwd=repo_dir, check=True)
+    main_health = maintain.get_repo_health(repo_dir)
+    wt_health = maintain.get_repo_health(str(tmp_path / "wt"))
+    assert wt_health["commit_graph"]
+    assert wt_health["loose_objects"] == main_health["loose_objects"] > 0
+    assert maintain.plan_maintenance(wt_health) == []
+
+def test_merge_rejects_bad_partials_and_options(tmp_path):
+    from check_repo_status.multi_repo_status import write_partial
+    part1 = tmp_path / "part1.json"
+    part2 = tmp_path / "part2.json"
+    write_partial(str(part1), [], shard=(1, 2))
+    write_partial(str(part2), [], shard=(1, 3))
+    dup_shard = tmp_path / "dup_shard.json"
+    write_partial(str(dup_shard), [], shard=(1, 2))
+    part_a = tmp_path / "part_a.json"
+    part_b = tmp_path / "part_b.json"
+    write_partial(str(part_a), [{"name": "repo1", "staged": 0, "unstaged": 0, "untracked": 0}], shard=(1, 2))
+    write_partial(str(part_b), [{"name": "repo1", "staged": 0, "unstaged": 0, "untracked": 0}], shard=(2, 2))
+    bad = tmp_path / "bad.json"
+    bad.write_text("{not json")
+    cmd = [sys.executable, '-m', 'check_repo_status.multi_repo_status']
+    for args, message in [
+        (['--merge', str(part1), str(part2)], "expected N=2"),
+        (['--merge', str(part1), str(dup_shard)], "shard 1/2, which is already merged"),
+        (['--merge', str(part_a), str(part_b)], "repeats repo(s) already merged: repo1"),
+        (['--merge', str(bad)], "Malformed partial"),
+        (['--merge', str(tmp_path / 'missing.json')], "Could not read partial"),
+        (['--merge', str(part1), '--shard', '1/2'], "--shard cannot be combined"),
+        (['--merge', str(part1), '--pull'], "--pull cannot be combined"),
+    ]:
+        result = subprocess.run(cmd + args, capture_output=True, text=True)
+        assert result.returncode == 2
+        assert message in result.stderr and "Traceback" not in result.stderr
+
+def test_write_partial_removes_temp_file_on_failure(tmp_path):
+    from check_repo_status import multi_repo_status
+    with patch.object(multi_repo_status.json, 'dump', side_effect=TypeError("boom")):
+        with pytest.raises(TypeError):
+            multi_repo_status.write_partial(str(tmp_path / "part.json"), [])
+    assert list(tmp_path.iterdir()) == []